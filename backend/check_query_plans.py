@@ -0,0 +1,175 @@
+# backend/check_query_plans.py
+#
+# Seeds a scratch schema in a LOCAL database with a realistic amount of data, applies the
+# migrations, and runs EXPLAIN on every query db_utils.py issues. Exits non-zero if any of
+# them plans a sequential scan on a table large enough for that to matter.
+#
+#   LOCAL_DATABASE_URI=postgresql://localhost/attendance_dev python check_query_plans.py
+
+import os
+import sys
+import psycopg2
+import psycopg2.extras
+import psycopg2.sql
+from dotenv import load_dotenv
+import db_utils
+from migrate import apply_migrations
+
+load_dotenv()
+
+SCHEMA = 'query_plan_check'
+STUDENTS = 6000
+FACULTY = 200
+ENROLLED_FACES = 5000
+DEPARTMENTS = ['CSE', 'ECE', 'EEE', 'MECH', 'CIVIL', 'IT', 'AIDS', 'CSBS']
+SUBJECTS_PER_DEPARTMENT = 6
+SEMESTER_DAYS = 100
+# Earlier semesters' sessions (4 years x 3 sections x 7 semesters per subject) stay in the table.
+PAST_SESSION_YEARS = 4
+PAST_SESSION_SECTIONS = ['A', 'B', 'C']
+PAST_SEMESTERS = 7
+# Tables below this many rows fit in a few pages; the planner is right to scan them once. A scan
+# repeated for every outer row (inner side of a nested loop, or a subplan) is flagged at any size.
+SEQ_SCAN_MIN_ROWS = 1000
+
+def seed(cur):
+    """Fills the scratch schema with one semester of data for a mid-sized college."""
+    cur.execute("""
+        INSERT INTO users ("firstName", "lastName", email, phone, role, department, "registrationNumber", password)
+        SELECT 'Student', i::text, 'student' || i || '@university.edu', '9000000000', 'student',
+               (%(departments)s)[1 + i %% %(n_departments)s], 'REG' || lpad(i::text, 6, '0'), 'x'
+        FROM generate_series(1, %(students)s) AS i;
+
+        INSERT INTO users ("firstName", "lastName", email, phone, role, department, "registrationNumber", password)
+        SELECT 'Faculty', i::text, 'faculty' || i || '@university.edu', '8000000000', 'faculty',
+               (%(departments)s)[1 + i %% %(n_departments)s], NULL, 'x'
+        FROM generate_series(1, %(faculty)s) AS i;
+
+        INSERT INTO sessions (session_name, subject, department, year, section, faculty_email, total_classes)
+        SELECT d || '-SUB' || s, d || '-SUB' || s, d, '3', 'A', 'faculty' || s || '@university.edu', %(days)s
+        FROM unnest(%(departments)s) AS d, generate_series(1, %(subjects)s) AS s;
+
+        INSERT INTO sessions (session_name, subject, department, year, section, faculty_email, total_classes)
+        SELECT d || '-SUB' || s || '-Y' || y || sec || '-SEM' || sem, d || '-SUB' || s, d, y::text, sec,
+               'faculty' || s || '@university.edu', %(days)s
+        FROM unnest(%(departments)s) AS d, generate_series(1, %(subjects)s) AS s,
+             generate_series(1, %(past_years)s) AS y, unnest(%(past_sections)s) AS sec,
+             generate_series(1, %(past_semesters)s) AS sem;
+
+        -- Chronological, as log_attendance appends it day by day.
+        INSERT INTO attendance (name, reg_no, time, date, status, mode, session_name)
+        SELECT 'Student ' || i, 'REG' || lpad(i::text, 6, '0'), '09:00:00', DATE '2025-07-01' + day,
+               CASE WHEN random() < 0.85 THEN 'Present' ELSE 'Absent' END, 'In-Person',
+               (%(departments)s)[1 + i %% %(n_departments)s] || '-SUB' || (1 + day %% %(subjects)s)
+        FROM generate_series(1, %(students)s) AS i, generate_series(0, %(days)s - 1) AS day
+        ORDER BY day, i;
+    """, {
+        'departments': DEPARTMENTS, 'n_departments': len(DEPARTMENTS), 'students': STUDENTS,
+        'faculty': FACULTY, 'subjects': SUBJECTS_PER_DEPARTMENT, 'days': SEMESTER_DAYS,
+        'past_years': PAST_SESSION_YEARS, 'past_sections': PAST_SESSION_SECTIONS, 'past_semesters': PAST_SEMESTERS,
+    })
+    psycopg2.extras.execute_values(
+        cur, "INSERT INTO faces (name, reg_no, embedding) VALUES %s",
+        [(f"Student {i}", f"REG{i:06d}", os.urandom(512 * 4)) for i in range(1, ENROLLED_FACES + 1)],
+        page_size=500
+    )
+
+# (description, sql, params, tables the query reads in full by design). The SQL is imported
+# from db_utils, so the check always plans the queries the app actually runs.
+QUERIES = [
+    ("find_user_by_email", db_utils.FIND_USER_BY_EMAIL_SQL, ('student42@university.edu',), ()),
+    ("verify_user_credentials", db_utils.VERIFY_USER_CREDENTIALS_SQL, ('REG000042', 'REG000042', 'student'), ()),
+    ("get_students_without_faces", db_utils.STUDENTS_WITHOUT_FACES_SQL, (), ('users', 'faces')),
+    ("log_attendance: student lookup", db_utils.STUDENT_NAME_SQL, ('REG000042',), ()),
+    ("log_attendance: duplicate check", db_utils.ATTENDANCE_MARKED_SQL, ('REG000042', '2025-07-15', 'CSE-SUB3'), ()),
+    ("add_face_embedding: lookup", db_utils.FACE_ID_SQL, ('REG000042',), ()),
+    ("add_face_embedding: update", db_utils.UPDATE_FACE_SQL, ('Student 42', b'', 'REG000042'), ()),
+    ("delete_face", db_utils.DELETE_FACE_SQL, ('REG000042',), ()),
+    ("get_student_dashboard_data: subject totals", db_utils.SUBJECT_TOTALS_SQL, (), ('sessions',)),
+    ("get_student_dashboard_data: attended", db_utils.PRESENT_SESSIONS_SQL, ('REG000042',), ()),
+    ("get_all_students", db_utils.ALL_STUDENTS_SQL, (), ('users', 'faces')),
+    ("attendance report: session", *db_utils.attendance_report_query({'session': 'CSE-SUB3'}), ('users',)),
+    ("attendance report: subject", *db_utils.attendance_report_query({'subject': 'ECE-SUB2'}), ('users',)),
+    ("attendance report: date range", *db_utils.attendance_report_query({'dateFrom': '2025-07-10', 'dateTo': '2025-07-12'}), ('users',)),
+    ("attendance report: department semester",
+     *db_utils.attendance_report_query({'department': 'MECH', 'dateFrom': '2025-07-01', 'dateTo': '2025-12-31'}),
+     ('users', 'attendance')),
+    ("attendance report: department register",
+     *db_utils.attendance_pivot_query({'department': 'MECH'}, ['2025-07-01', '2025-07-02']), ('users', 'attendance')),
+    ("attendance report: session register",
+     *db_utils.attendance_pivot_query({'session': 'CSE-SUB3'}, ['2025-07-01', '2025-07-02']), ('users', 'attendance')),
+    ("attendance report: subject register",
+     *db_utils.attendance_pivot_query({'subject': 'ECE-SUB2'}, ['2025-07-01', '2025-07-02']), ('users', 'attendance')),
+]
+
+# Reports hash-join the whole student list, and a department's full semester is a large share
+# of attendance. load_known_embeddings_facenet reads every face by design and is not listed.
+
+def seq_scans(plan, repeated=False):
+    """
+    Yields (relation name, repeated) for every Seq Scan node in an EXPLAIN (FORMAT JSON) plan tree.
+    repeated is True when the scan can run once per outer row rather than once per query.
+    """
+    if plan.get('Node Type') == 'Seq Scan':
+        yield plan['Relation Name'], repeated
+    if plan.get('Node Type') in ('Hash', 'Materialize'):
+        # These run their input once and then serve every outer row from memory.
+        repeated = False
+    for child in plan.get('Plans', []):
+        child_repeated = repeated or child.get('Parent Relationship') == 'SubPlan' or (
+            plan.get('Node Type') == 'Nested Loop' and child.get('Parent Relationship') == 'Inner')
+        yield from seq_scans(child, child_repeated)
+
+def check_query_plans(conn):
+    """Runs EXPLAIN on each query and returns a list of (description, table) sequential scans."""
+    failures = []
+    with conn.cursor() as cur:
+        cur.execute("SELECT relname, reltuples FROM pg_class WHERE relnamespace = %s::regnamespace", (SCHEMA,))
+        row_counts = dict(cur.fetchall())
+        for description, query, params, full_reads in QUERIES:
+            if isinstance(query, str): query = psycopg2.sql.SQL(query)
+            cur.execute(psycopg2.sql.SQL("EXPLAIN (FORMAT JSON) ") + query, params)
+            plan = cur.fetchone()[0][0]['Plan']
+            scanned = [t for t, repeated in seq_scans(plan)
+                       if t not in full_reads and (repeated or row_counts.get(t, 0) >= SEQ_SCAN_MIN_ROWS)]
+            if scanned:
+                failures.extend((description, table) for table in scanned)
+                print(f"🔴 {description}: sequential scan on {', '.join(scanned)}")
+            else:
+                print(f"✅ {description}")
+    return failures
+
+def main():
+    conn_string = os.getenv("LOCAL_DATABASE_URI")
+    if not conn_string:
+        print("🔴 Set LOCAL_DATABASE_URI to a local database; this script seeds test data into it.")
+        return 1
+    conn = psycopg2.connect(conn_string)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA}; SET search_path TO {SCHEMA};")
+        conn.commit()
+        if not apply_migrations(conn): return 1
+        print("Seeding test data...")
+        with conn.cursor() as cur:
+            seed(cur)
+        conn.commit()
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("VACUUM ANALYZE users, faces, sessions, attendance;")
+        conn.autocommit = False
+        failures = check_query_plans(conn)
+    finally:
+        conn.rollback()
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;")
+        conn.close()
+    if failures:
+        print(f"\n🔴 {len(failures)} sequential scan(s) found.")
+        return 1
+    print("\nAll queries use indexes!")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,7 @@
 # backend/db_utils.py
 import psycopg2
 import psycopg2.extras
+import psycopg2.sql
 import numpy as np
 import os
 import bcrypt 
@@ -30,7 +31,7 @@ def create_user(data):
         with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
             sql = """
                 INSERT INTO users ("firstName", "lastName", email, phone, role, department, "registrationNumber", password)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                VALUES (%s, %s, %s, %s, %s, %s, NULLIF(%s, ''), %s)
                 RETURNING id, "firstName", "lastName", email, phone, role, department, "registrationNumber";
             """
             cur.execute(sql, (
@@ -48,6 +49,8 @@ def create_user(data):
     finally:
         if conn: conn.close()
 
+FIND_USER_BY_EMAIL_SQL = "SELECT * FROM users WHERE email = %s"
+
 def find_user_by_email(email):
     """Finds a user by their email to check for duplicates."""
     conn = get_db_connection()
@@ -55,7 +58,7 @@ def find_user_by_email(email):
     user_data = None
     try:
         with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
-            cur.execute("SELECT * FROM users WHERE email = %s", (email,))
+            cur.execute(FIND_USER_BY_EMAIL_SQL, (email,))
             user_data = cur.fetchone()
     except Exception as e:
         print(f"🔴 Error finding user by email: {e}")
@@ -63,17 +66,18 @@ def find_user_by_email(email):
         if conn: conn.close()
     return dict(user_data) if user_data else None
 
+VERIFY_USER_CREDENTIALS_SQL = """
+    SELECT id, "firstName", "lastName", email, phone, role, department, "registrationNumber", password 
+    FROM users WHERE (email = %s OR "registrationNumber" = %s) AND role = %s;
+"""
+
 def verify_user_credentials(user_id, password, role):
     """Verifies a user's credentials AND their role against the database."""
     conn = get_db_connection()
     if not conn: return None
     try:
         with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
-            sql = """
-                SELECT id, "firstName", "lastName", email, phone, role, department, "registrationNumber", password 
-                FROM users WHERE (email = %s OR "registrationNumber" = %s) AND role = %s;
-            """
-            cur.execute(sql, (user_id, user_id, role))
+            cur.execute(VERIFY_USER_CREDENTIALS_SQL, (user_id, user_id, role))
             user_data = cur.fetchone()
         if not user_data: return None 
         hashed_password = user_data['password'].encode('utf-8')
@@ -89,6 +93,12 @@ def verify_user_credentials(user_id, password, role):
     finally:
         if conn: conn.close()
 
+STUDENTS_WITHOUT_FACES_SQL = """
+    SELECT u.id, u."firstName", u."lastName", u."registrationNumber", u.department
+    FROM users u LEFT JOIN faces f ON u."registrationNumber" = f.reg_no
+    WHERE u.role = 'student' AND f.id IS NULL;
+"""
+
 def get_students_without_faces():
     """Retrieves a list of students who have not yet had their face enrolled."""
     conn = get_db_connection()
@@ -96,12 +106,7 @@ def get_students_without_faces():
     students = []
     try:
         with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
-            sql = """
-                SELECT u.id, u."firstName", u."lastName", u."registrationNumber", u.department
-                FROM users u LEFT JOIN faces f ON u."registrationNumber" = f.reg_no
-                WHERE u.role = 'student' AND f.id IS NULL;
-            """
-            cur.execute(sql)
+            cur.execute(STUDENTS_WITHOUT_FACES_SQL)
             rows = cur.fetchall()
             for row in rows: students.append(dict(row))
     except Exception as e:
@@ -141,6 +146,9 @@ def create_session(data):
 
 # --- ATTENDANCE & FACE RECOGNITION ---
 
+STUDENT_NAME_SQL = 'SELECT "firstName", "lastName" FROM users WHERE "registrationNumber" = %s'
+ATTENDANCE_MARKED_SQL = "SELECT id FROM attendance WHERE reg_no = %s AND date = %s AND session_name = %s"
+
 def log_attendance(reg_no, session_name):
     """Checks if a student is already marked for the session today, and if not, marks them present."""
     conn = get_db_connection()
@@ -151,12 +159,12 @@ def log_attendance(reg_no, session_name):
 
     try:
         with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
-            cur.execute('SELECT "firstName", "lastName" FROM users WHERE "registrationNumber" = %s', (reg_no,))
+            cur.execute(STUDENT_NAME_SQL, (reg_no,))
             user = cur.fetchone()
             if not user: return None, f"No student found with registration number {reg_no}."
             student_name = f"{user['firstName']} {user['lastName']}"
 
-            cur.execute("SELECT id FROM attendance WHERE reg_no = %s AND date = %s AND session_name = %s", (reg_no, today_str, session_name))
+            cur.execute(ATTENDANCE_MARKED_SQL, (reg_no, today_str, session_name))
             if cur.fetchone(): return student_name, "Already marked for this session today."
 
             cur.execute(
@@ -172,6 +180,9 @@ def log_attendance(reg_no, session_name):
     finally:
         if conn: conn.close()
 
+FACE_ID_SQL = "SELECT id FROM faces WHERE reg_no = %s"
+UPDATE_FACE_SQL = "UPDATE faces SET name = %s, embedding = %s WHERE reg_no = %s"
+
 def add_face_embedding(name, reg_no, embedding):
     """Inserts or updates a face record in the database."""
     conn = get_db_connection()
@@ -179,9 +190,9 @@ def add_face_embedding(name, reg_no, embedding):
     try:
         with conn.cursor() as cur:
             embedding_bytes = embedding.tobytes()
-            cur.execute("SELECT id FROM faces WHERE reg_no = %s", (reg_no,))
+            cur.execute(FACE_ID_SQL, (reg_no,))
             if cur.fetchone():
-                cur.execute("UPDATE faces SET name = %s, embedding = %s WHERE reg_no = %s", (name, embedding_bytes, reg_no))
+                cur.execute(UPDATE_FACE_SQL, (name, embedding_bytes, reg_no))
             else:
                 cur.execute("INSERT INTO faces (name, reg_no, embedding) VALUES (%s, %s, %s)", (name, reg_no, embedding_bytes))
             conn.commit()
@@ -216,21 +227,23 @@ def load_known_embeddings_facenet():
 
 # --- DASHBOARD DATA FUNCTION ---
 
+SUBJECT_TOTALS_SQL = "SELECT subject, total_classes FROM sessions;"
+PRESENT_SESSIONS_SQL = "SELECT session_name FROM attendance WHERE reg_no = %s AND status = 'Present';"
+
 def get_student_dashboard_data(reg_no):
     """Calculates attendance stats by fetching total class counts from the 'sessions' table."""
     conn = get_db_connection()
     if not conn: return None
     try:
         with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
-            cur.execute("SELECT subject, total_classes FROM sessions;")
+            cur.execute(SUBJECT_TOTALS_SQL)
             session_rows = cur.fetchall()
             if not session_rows:
                 raise Exception("No sessions found. Please populate the 'sessions' table.")
             
             subject_totals = {row['subject']: row['total_classes'] for row in session_rows}
 
-            sql = "SELECT session_name FROM attendance WHERE reg_no = %s AND status = 'Present';"
-            cur.execute(sql, (reg_no,))
+            cur.execute(PRESENT_SESSIONS_SQL, (reg_no,))
             records = cur.fetchall()
 
             if not records: 
@@ -277,6 +290,8 @@ def get_student_dashboard_data(reg_no):
         if conn: conn.close()
 # Add this new function to backend/db_utils.py
 
+DELETE_FACE_SQL = "DELETE FROM faces WHERE reg_no = %s"
+
 def delete_face(reg_no):
     """Deletes a face record from the database based on the registration number."""
     conn = get_db_connection()
@@ -285,7 +300,7 @@ def delete_face(reg_no):
 
     try:
         with conn.cursor() as cur:
-            cur.execute("DELETE FROM faces WHERE reg_no = %s", (reg_no,))
+            cur.execute(DELETE_FACE_SQL, (reg_no,))
             # Check if a row was actually deleted
             deleted_rows = cur.rowcount
             conn.commit()
@@ -301,6 +316,20 @@ def delete_face(reg_no):
             conn.close()
 # Add this new function to backend/db_utils.py
 
+ALL_STUDENTS_SQL = """
+    SELECT 
+        u.id, 
+        u."firstName", 
+        u."lastName", 
+        u."registrationNumber", 
+        u.department, 
+        u.email,
+        CASE WHEN f.id IS NOT NULL THEN TRUE ELSE FALSE END AS enrolled
+    FROM users u
+    LEFT JOIN faces f ON u."registrationNumber" = f.reg_no
+    WHERE u.role = 'student';
+"""
+
 def get_all_students():
     """Retrieves all students and checks if they have a face enrolled."""
     conn = get_db_connection()
@@ -309,20 +338,7 @@ def get_all_students():
     try:
         with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
             # Join users with faces to see who is enrolled
-            sql = """
-                SELECT 
-                    u.id, 
-                    u."firstName", 
-                    u."lastName", 
-                    u."registrationNumber", 
-                    u.department, 
-                    u.email,
-                    CASE WHEN f.id IS NOT NULL THEN TRUE ELSE FALSE END AS enrolled
-                FROM users u
-                LEFT JOIN faces f ON u."registrationNumber" = f.reg_no
-                WHERE u.role = 'student';
-            """
-            cur.execute(sql)
+            cur.execute(ALL_STUDENTS_SQL)
             rows = cur.fetchall()
             for row in rows:
                 # Combine firstName and lastName into a single 'name' field for the frontend
@@ -333,4 +349,151 @@ def get_all_students():
         print(f"🔴 Error fetching all students: {e}")
     finally:
         if conn: conn.close()
-    return students
\ No newline at end of file
+    return students
+# --- ATTENDANCE REPORTS ---
+
+REPORT_CHUNK_SIZE = 2000
+# The register has one column (and one bound parameter) per date; this keeps it well under
+# PostgreSQL's 1664-column limit and bounds the work one request can ask for.
+REPORT_MAX_PIVOT_DAYS = 366
+
+def _build_report_filters(filters):
+    """
+    Splits report filters into attendance-side and student-side SQL conditions.
+    Returns (attendance_clauses, attendance_params, student_clauses, student_params).
+    """
+    attendance_clauses, attendance_params = [], []
+    if filters.get('session'):
+        attendance_clauses.append("a.session_name = %s")
+        attendance_params.append(filters['session'])
+    if filters.get('subject'):
+        # sessions.session_name is not unique, so match against the list of names rather than joining
+        # rows in. As an array the names become an index condition on attendance (session_name, date).
+        attendance_clauses.append("a.session_name = ANY(ARRAY(SELECT session_name FROM sessions WHERE subject = %s))")
+        attendance_params.append(filters['subject'])
+    if filters.get('dateFrom'):
+        attendance_clauses.append("a.date >= %s")
+        attendance_params.append(filters['dateFrom'])
+    if filters.get('dateTo'):
+        attendance_clauses.append("a.date <= %s")
+        attendance_params.append(filters['dateTo'])
+    student_clauses, student_params = [], []
+    if filters.get('department'):
+        student_clauses.append("u.department = %s")
+        student_params.append(filters['department'])
+    return attendance_clauses, attendance_params, student_clauses, student_params
+
+def _where(clauses):
+    return "WHERE " + " AND ".join(clauses) if clauses else ""
+
+REPORT_COLUMNS = ['reg_no', 'name', 'department', 'session_name', 'subject', 'date', 'time', 'status', 'mode']
+
+def attendance_report_query(filters):
+    """Returns (sql, params) for the flat attendance report, one row per attendance record."""
+    attendance_clauses, attendance_params, student_clauses, student_params = _build_report_filters(filters)
+    query = f"""
+        SELECT a.reg_no, a.name, u.department, a.session_name, s.subject,
+            a.date, a.time, a.status, a.mode
+        FROM attendance a
+        JOIN users u ON u."registrationNumber" = a.reg_no
+        LEFT JOIN LATERAL (
+            SELECT subject FROM sessions WHERE session_name = a.session_name ORDER BY id LIMIT 1
+        ) s ON TRUE
+        {_where(attendance_clauses + student_clauses)}
+        ORDER BY a.date, a.session_name, a.reg_no;
+    """
+    return query, attendance_params + student_params
+
+def attendance_report_dates_query(filters):
+    """Returns (sql, params) listing the distinct dates that have attendance matching the filters."""
+    attendance_clauses, attendance_params, student_clauses, student_params = _build_report_filters(filters)
+    query = f"""
+        SELECT DISTINCT a.date::text
+        FROM attendance a
+        JOIN users u ON u."registrationNumber" = a.reg_no
+        {_where(attendance_clauses + student_clauses)}
+        ORDER BY 1;
+    """
+    return query, attendance_params + student_params
+
+def _pivot_roster_filters(filters):
+    """
+    Picks the students who get a row in the register: the department filter if given, otherwise
+    the department(s) of the filtered session or subject. Returns (clauses, params), or None if
+    the filters name no class at all.
+    """
+    if filters.get('department'):
+        return ["u.department = %s"], [filters['department']]
+    if filters.get('session'):
+        return ["u.department IN (SELECT department FROM sessions WHERE session_name = %s)"], [filters['session']]
+    if filters.get('subject'):
+        return ["u.department IN (SELECT department FROM sessions WHERE subject = %s)"], [filters['subject']]
+    return None
+
+def attendance_pivot_query(filters, dates):
+    """
+    Returns (sql, params) for the per-student-by-date register. There is one row per student in the
+    roster chosen by _pivot_roster_filters (the department, or else the session's or subject's
+    department), so students with no attendance in range still appear, marked 'A' with attended = 0.
+    """
+    attendance_clauses, attendance_params, _, _ = _build_report_filters(filters)
+    student_clauses, student_params = _pivot_roster_filters(filters)
+    date_columns = [
+        psycopg2.sql.SQL("CASE WHEN bool_or(a.status = 'Present' AND a.date = %s) THEN 'P' ELSE 'A' END AS {}").format(psycopg2.sql.Identifier(d))
+        for d in dates
+    ]
+    join_condition = " AND ".join(['a.reg_no = u."registrationNumber"'] + attendance_clauses)
+    query = psycopg2.sql.SQL("""
+        SELECT u."registrationNumber" AS reg_no, u."firstName" || ' ' || u."lastName" AS name, u.department,
+            {date_columns}
+            COUNT(a.id) FILTER (WHERE a.status = 'Present') AS attended
+        FROM users u
+        LEFT JOIN attendance a ON {join_condition}
+        {where}
+        GROUP BY u.id ORDER BY u."registrationNumber";
+    """).format(
+        date_columns=psycopg2.sql.SQL("").join(col + psycopg2.sql.SQL(", ") for col in date_columns),
+        join_condition=psycopg2.sql.SQL(join_condition),
+        where=psycopg2.sql.SQL(_where(["u.role = 'student'"] + student_clauses))
+    )
+    return query, dates + attendance_params + student_params
+
+def stream_attendance_report(filters, pivot=False, chunk_size=REPORT_CHUNK_SIZE):
+    """
+    Streams attendance rows from a server-side cursor so large exports run in constant memory.
+    Yields the list of column names first, then lists of row tuples of at most chunk_size rows.
+    With pivot=True there is one row per student and one 'P'/'A' column per date, built in SQL;
+    the filters must then name a department, session or subject (see _pivot_roster_filters).
+    Errors before the header end the generator empty; errors after it are raised so the
+    response is aborted instead of ending like a complete file.
+    """
+    conn = get_db_connection()
+    if not conn: return
+    try:
+        try:
+            if pivot:
+                with conn.cursor() as cur:
+                    cur.execute(*attendance_report_dates_query(filters))
+                    dates = [row[0] for row in cur.fetchall()]
+                if len(dates) > REPORT_MAX_PIVOT_DAYS:
+                    raise Exception(f"Register spans {len(dates)} dates; the limit is {REPORT_MAX_PIVOT_DAYS}.")
+                query, params = attendance_pivot_query(filters, dates)
+                columns = ['reg_no', 'name', 'department'] + dates + ['attended']
+            else:
+                query, params = attendance_report_query(filters)
+                columns = REPORT_COLUMNS
+            # A named cursor keeps the result set on the server; rows are pulled chunk_size at a time.
+            cur = conn.cursor(name='attendance_report')
+            cur.itersize = chunk_size
+            cur.execute(query, params)
+        except Exception as e:
+            print(f"🔴 Error starting attendance report: {e}")
+            return
+        yield columns
+        with cur:
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows: break
+                yield rows
+    finally:
+        conn.close()
@@ -0,0 +1,58 @@
+# backend/migrate.py
+
+import os
+import sys
+from db_utils import get_db_connection
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+def list_migrations():
+    """Returns (version, filename) pairs for every NNNN_name.sql file, in version order."""
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        if filename.endswith('.sql'):
+            migrations.append((int(filename.split('_', 1)[0]), filename))
+    return migrations
+
+def apply_migrations(conn):
+    """Applies every migration newer than the recorded schema version, each in its own transaction."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            );
+        """)
+        cur.execute("SELECT version FROM schema_migrations")
+        applied = {row[0] for row in cur.fetchall()}
+    conn.commit()
+
+    for version, filename in list_migrations():
+        if version in applied: continue
+        print(f"Applying migration {filename}...")
+        try:
+            with open(os.path.join(MIGRATIONS_DIR, filename)) as f:
+                migration_sql = f.read()
+            with conn.cursor() as cur:
+                cur.execute(migration_sql)
+                cur.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, filename))
+            conn.commit()
+            print(f"✅ Migration {filename} applied.")
+        except Exception as e:
+            conn.rollback()
+            print(f"🔴 Migration {filename} failed: {e}")
+            return False
+    return True
+
+if __name__ == '__main__':
+    conn = get_db_connection()
+    if not conn:
+        print("🔴 Could not connect to database. Aborting migration.")
+        sys.exit(1)
+    try:
+        ok = apply_migrations(conn)
+    finally:
+        conn.close()
+    if ok: print("\nDatabase schema is up to date!")
+    sys.exit(0 if ok else 1)
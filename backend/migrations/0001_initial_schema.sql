@@ -0,0 +1,45 @@
+-- 0001_initial_schema.sql
+-- Tables used by db_utils.py, seed.py and student_db.py.
+
+CREATE TABLE IF NOT EXISTS users (
+    id SERIAL PRIMARY KEY,
+    "firstName" TEXT NOT NULL,
+    "lastName" TEXT NOT NULL,
+    email TEXT NOT NULL,
+    phone TEXT,
+    role TEXT NOT NULL CHECK (role IN ('admin', 'faculty', 'student')),
+    department TEXT,
+    "registrationNumber" TEXT,
+    password TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS faces (
+    id SERIAL PRIMARY KEY,
+    name TEXT NOT NULL,
+    reg_no TEXT NOT NULL,
+    embedding BYTEA NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    id SERIAL PRIMARY KEY,
+    session_name TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    department TEXT,
+    year TEXT,
+    section TEXT,
+    faculty_email TEXT,
+    total_classes INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS attendance (
+    id SERIAL PRIMARY KEY,
+    name TEXT NOT NULL,
+    reg_no TEXT NOT NULL,
+    time TIME NOT NULL,
+    date DATE NOT NULL,
+    status TEXT NOT NULL DEFAULT 'Present',
+    mode TEXT,
+    session_name TEXT NOT NULL
+);
@@ -0,0 +1,30 @@
+-- 0002_hot_query_indexes.sql
+-- Unique constraints and indexes for every lookup in db_utils.py.
+-- Run `python check_query_plans.py` after changing a query or an index here.
+
+-- find_user_by_email, seed.py duplicate check, verify_user_credentials (email branch).
+CREATE UNIQUE INDEX IF NOT EXISTS users_email_key ON users (email);
+
+-- log_attendance name lookup, verify_user_credentials (registration number branch).
+-- Partial so faculty and admin accounts, which have no registration number (NULL, or '' from
+-- older sign-ups), do not collide.
+CREATE UNIQUE INDEX IF NOT EXISTS users_registration_number_key ON users ("registrationNumber")
+    WHERE "registrationNumber" IS NOT NULL AND "registrationNumber" <> '';
+
+-- student_db.py relies on this for ON CONFLICT (reg_no); also add_face_embedding, delete_face
+-- and the faces side of the users LEFT JOIN faces student lists. The users side of those joins
+-- returns every student, so it is read in full and gets no index of its own.
+CREATE UNIQUE INDEX IF NOT EXISTS faces_reg_no_key ON faces (reg_no);
+
+-- log_attendance duplicate check. Unique so two concurrent scans cannot mark a student twice.
+CREATE UNIQUE INDEX IF NOT EXISTS attendance_reg_no_date_session_key
+    ON attendance (reg_no, date, session_name);
+
+-- get_student_dashboard_data: present rows for one student, covering session_name.
+CREATE INDEX IF NOT EXISTS attendance_present_reg_no_idx
+    ON attendance (reg_no) INCLUDE (session_name)
+    WHERE status = 'Present';
+
+-- Attendance report filters by session and by date range.
+CREATE INDEX IF NOT EXISTS attendance_session_date_idx ON attendance (session_name, date);
+CREATE INDEX IF NOT EXISTS attendance_date_idx ON attendance (date);
@@ -0,0 +1,9 @@
+-- 0003_session_indexes.sql
+-- Indexes for the attendance reports' lookups into sessions.
+
+-- Flat report: one subject lookup per attendance row
+-- (WHERE session_name = a.session_name ORDER BY id LIMIT 1), and the register's roster by session.
+CREATE INDEX IF NOT EXISTS sessions_session_name_idx ON sessions (session_name, id) INCLUDE (subject);
+
+-- Report and register subject filters.
+CREATE INDEX IF NOT EXISTS sessions_subject_idx ON sessions (subject);
@@ -0,0 +1,45 @@
+# backend/reports.py
+import csv
+import io
+from datetime import date, time
+
+def _csv_value(value):
+    """Formats dates and times as ISO strings; other values are left to the csv module."""
+    if isinstance(value, (date, time)): return value.isoformat()
+    return value
+
+def csv_stream(columns, chunks):
+    """Encodes report chunks as CSV, yielding one block of text per chunk."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    for rows in chunks:
+        buffer.seek(0)
+        buffer.truncate(0)
+        writer.writerows([_csv_value(value) for value in row] for row in rows)
+        yield buffer.getvalue()
+
+def arrow_stream(columns, chunks):
+    """Encodes report chunks as an Arrow IPC stream, one record batch per chunk."""
+    import pyarrow as pa
+
+    sink = io.BytesIO()
+    writer = None
+    for rows in chunks:
+        data = list(zip(*rows))
+        if writer is None:
+            # Types are taken from the first chunk; all-NULL columns fall back to strings.
+            arrays = [pa.array(values) for values in data]
+            fields = [pa.field(name, pa.string() if arr.type == pa.null() else arr.type) for name, arr in zip(columns, arrays)]
+            schema = pa.schema(fields)
+            writer = pa.ipc.new_stream(sink, schema)
+        batch = pa.record_batch([pa.array(values, type=field.type) for values, field in zip(data, schema)], schema=schema)
+        writer.write_batch(batch)
+        yield sink.getvalue()
+        sink.seek(0)
+        sink.truncate(0)
+    if writer is None:
+        writer = pa.ipc.new_stream(sink, pa.schema([pa.field(name, pa.string()) for name in columns]))
+    writer.close()
+    yield sink.getvalue()
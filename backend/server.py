@@ -1,10 +1,14 @@
 # backend/server.py
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
 import db_utils 
+import reports
 import numpy as np
 import torch
 import cv2
+import threading
+import time
+from collections import OrderedDict
 from facenet_pytorch import MTCNN, InceptionResnetV1
 from datetime import datetime
 from sklearn.metrics.pairwise import cosine_similarity
@@ -21,6 +25,81 @@ print("👤 Loading known faces from database...")
 KNOWN_FACE_EMBEDDINGS, KNOWN_FACE_REG_NOS = db_utils.load_known_embeddings_facenet()
 print(f"✅ {len(KNOWN_FACE_REG_NOS)} faces loaded into memory.")
 
+# --- PER-CAMERA FRAME GATING ---
+# Each camera keeps a tiny greyscale thumbnail of the last frame that went through the models,
+# plus that frame's result. Frames that barely differ from it reuse the result with no inference.
+FRAME_THUMBNAIL_SIZE = (32, 24)
+FRAME_TILE_SIZE = 4  # Thumbnail pixels per side of each tile compared for change.
+# Mean absolute grey-level difference (0-255) within any single tile that counts as a change.
+# Taking the max over tiles means one student arriving in a corner of a wide shot still counts.
+FRAME_CHANGE_THRESHOLD = 10.0
+FRAME_RESULT_TTL = 30  # Seconds a cached success stays valid before a static scene is re-checked.
+FRAME_MISS_TTL = 6  # Seconds a cached no_face / not_recognized result stays valid (two scans).
+MAX_TRACKED_CAMERAS = 256
+CAMERA_STATE = OrderedDict()
+CAMERA_STATE_LOCK = threading.Lock()
+
+def frame_thumbnail(img_bytes):
+    """Decodes a frame at 1/8 scale in greyscale and shrinks it to a fixed-size thumbnail."""
+    small = cv2.imdecode(np.frombuffer(img_bytes, np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if small is None: return None
+    return cv2.resize(small, FRAME_THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+def frame_change(thumbnail, reference):
+    """Returns the largest per-tile mean absolute difference between two thumbnails."""
+    height, width = thumbnail.shape
+    diff = np.abs(thumbnail - reference).reshape(height // FRAME_TILE_SIZE, FRAME_TILE_SIZE, width // FRAME_TILE_SIZE, FRAME_TILE_SIZE)
+    return float(diff.mean(axis=(1, 3)).max())
+
+def get_cached_camera_result(camera_id, session_name, thumbnail):
+    """Returns the camera's last result if this frame has not changed enough to need inference."""
+    with CAMERA_STATE_LOCK:
+        state = CAMERA_STATE.get(camera_id)
+        if not state or state['session_name'] != session_name: return None
+        if time.time() > state['expires_at']: return None
+        if frame_change(thumbnail, state['thumbnail']) >= FRAME_CHANGE_THRESHOLD: return None
+        CAMERA_STATE.move_to_end(camera_id)
+        return state['result']
+
+def save_camera_result(camera_id, session_name, thumbnail, result):
+    """Records the frame and result for a camera, evicting the least recently seen camera if full."""
+    if result['status'] == 'success':
+        # The student is marked now, so replays must not claim to mark them again.
+        result = {**result, 'message': f"{result['studentName']}: Already marked for this session today."}
+        ttl = FRAME_RESULT_TTL
+    else:
+        ttl = FRAME_MISS_TTL
+    with CAMERA_STATE_LOCK:
+        CAMERA_STATE[camera_id] = {
+            'session_name': session_name, 'thumbnail': thumbnail, 'result': result, 'expires_at': time.time() + ttl
+        }
+        CAMERA_STATE.move_to_end(camera_id)
+        while len(CAMERA_STATE) > MAX_TRACKED_CAMERAS: CAMERA_STATE.popitem(last=False)
+
+def recognize_and_mark(img_bytes, session_name):
+    """Runs face detection and recognition on a frame and marks attendance for a match."""
+    nparr = np.frombuffer(img_bytes, np.uint8)
+    img_bgr = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
+    face_tensor = mtcnn(img_rgb)
+    if face_tensor is None: return {'status': 'no_face', 'message': 'No face detected.'}
+
+    unknown_embedding = resnet(face_tensor.unsqueeze(0).to(device)).detach().cpu().numpy()
+    if len(KNOWN_FACE_EMBEDDINGS) > 0:
+        similarities = cosine_similarity(unknown_embedding, KNOWN_FACE_EMBEDDINGS)[0]
+        best_match_index = np.argmax(similarities)
+        max_similarity = similarities[best_match_index]
+
+        if max_similarity > 0.6: 
+            reg_no = KNOWN_FACE_REG_NOS[best_match_index]
+            student_name, message = db_utils.log_attendance(reg_no, session_name)
+            if student_name: return {'status': 'success', 'message': f'{student_name}: {message}', 'studentName': student_name}
+            else: return {'status': 'error', 'message': message}
+        else:
+            return {'status': 'not_recognized', 'message': 'Face not recognized.'}
+    else:
+        return {'status': 'not_recognized', 'message': 'No faces enrolled in the system.'}
+
 app = Flask(__name__)
 CORS(app)
 
@@ -142,33 +221,61 @@ def handle_attendance_session():
     if 'image' not in request.files: return jsonify({'message': 'No image file found'}), 400
     file = request.files['image']
     session_name = request.form.get('sessionName')
+    camera_id = request.form.get('cameraId')
     if not session_name: return jsonify({'message': 'Missing session name'}), 400
     try:
         img_bytes = file.read()
-        nparr = np.frombuffer(img_bytes, np.uint8)
-        img_bgr = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
-        face_tensor = mtcnn(img_rgb)
-        if face_tensor is None: return jsonify({'status': 'no_face', 'message': 'No face detected.'})
-
-        unknown_embedding = resnet(face_tensor.unsqueeze(0).to(device)).detach().cpu().numpy()
-        if len(KNOWN_FACE_EMBEDDINGS) > 0:
-            similarities = cosine_similarity(unknown_embedding, KNOWN_FACE_EMBEDDINGS)[0]
-            best_match_index = np.argmax(similarities)
-            max_similarity = similarities[best_match_index]
-
-            if max_similarity > 0.6: 
-                reg_no = KNOWN_FACE_REG_NOS[best_match_index]
-                student_name, message = db_utils.log_attendance(reg_no, session_name)
-                if student_name: return jsonify({'status': 'success', 'message': f'{student_name}: {message}'})
-                else: return jsonify({'status': 'error', 'message': message})
-            else:
-                return jsonify({'status': 'not_recognized', 'message': 'Face not recognized.'})
-        else:
-            return jsonify({'status': 'not_recognized', 'message': 'No faces enrolled in the system.'})
+        thumbnail = frame_thumbnail(img_bytes) if camera_id else None
+        if thumbnail is not None:
+            cached_result = get_cached_camera_result(camera_id, session_name, thumbnail)
+            if cached_result: return jsonify({**cached_result, 'cached': True})
+
+        result = recognize_and_mark(img_bytes, session_name)
+        # Errors are not cached so the next frame retries them.
+        if thumbnail is not None and result['status'] != 'error':
+            save_camera_result(camera_id, session_name, thumbnail, result)
+        return jsonify(result)
     except Exception as e:
         print(f"🔴 Error during attendance marking: {e}")
         return jsonify({'message': 'An internal server error occurred.'}), 500
 
+@app.route('/api/reports/attendance', methods=['GET'])
+def handle_attendance_report():
+    """Streams an attendance export filtered by session, subject, department and/or date range."""
+    filters = {key: request.args.get(key) for key in ('session', 'subject', 'department', 'dateFrom', 'dateTo')}
+    pivot = request.args.get('pivot', '').lower() in ('1', 'true', 'yes')
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in ('csv', 'arrow'): return jsonify({'message': 'Format must be csv or arrow.'}), 400
+    dates = {}
+    for key in ('dateFrom', 'dateTo'):
+        if filters[key]:
+            try:
+                dates[key] = datetime.strptime(filters[key], '%Y-%m-%d').date()
+            except ValueError:
+                return jsonify({'message': f'{key} must be a date in YYYY-MM-DD format.'}), 400
+    if pivot:
+        if len(dates) < 2: return jsonify({'message': 'A register (pivot) needs both dateFrom and dateTo.'}), 400
+        days = (dates['dateTo'] - dates['dateFrom']).days + 1
+        if days < 1: return jsonify({'message': 'dateFrom must not be after dateTo.'}), 400
+        if days > db_utils.REPORT_MAX_PIVOT_DAYS:
+            return jsonify({'message': f'A register (pivot) can cover at most {db_utils.REPORT_MAX_PIVOT_DAYS} days.'}), 400
+    if pivot and not any(filters[key] for key in ('department', 'session', 'subject')):
+        return jsonify({'message': 'A register (pivot) needs a department, session or subject.'}), 400
+    try:
+        chunks = db_utils.stream_attendance_report(filters, pivot=pivot)
+        # Pull the column header now so query errors surface as a 500 instead of a truncated download.
+        columns = next(chunks, None)
+        if columns is None: return jsonify({'message': 'Failed to generate attendance report.'}), 500
+        if export_format == 'arrow':
+            body, mimetype, extension = reports.arrow_stream(columns, chunks), 'application/vnd.apache.arrow.stream', 'arrows'
+        else:
+            body, mimetype, extension = reports.csv_stream(columns, chunks), 'text/csv', 'csv'
+        filename = f"attendance_{'pivot' if pivot else 'report'}.{extension}"
+        return Response(stream_with_context(body), mimetype=mimetype,
+                        headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+    except Exception as e:
+        print(f"🔴 Error in /api/reports/attendance route: {e}")
+        return jsonify({'message': 'An internal server error occurred.'}), 500
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
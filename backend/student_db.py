@@ -10,7 +10,52 @@ from db_utils import get_db_connection
 device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
 mtcnn = MTCNN(image_size=160, margin=0, min_face_size=20, device=device, keep_all=False)
 model = InceptionResnetV1(pretrained='vggface2').eval().to(device)
-SAMPLE_COUNT = 50
+SAMPLE_COUNT = 50  # Upper bound; enrollment usually stops earlier once the centroid converges.
+MIN_SAMPLES = 10
+BATCH_SIZE = 5
+CAPTURE_INTERVAL = 0.1  # Seconds between frames that are run through the detector.
+MIN_FACE_PROB = 0.95
+MIN_SHARPNESS = 60.0  # Variance of the Laplacian of the face crop; lower means blurry.
+DUPLICATE_THRESHOLD = 4.0  # Mean grey-level difference below which a crop repeats the last one.
+# Converged once the centroid's standard error, sqrt(sum of per-dimension variances / n) / |mean|,
+# drops below this. Checked by simulating unit 512-d embeddings (real captures were not available):
+# at a mean cosine to the centroid of 0.97 / 0.95 / 0.9 / 0.8 it stops after 10 / 10 / 20 / 40
+# samples, with the estimated centroid within ~0.006 (1 - cosine) of the true one.
+CONVERGENCE_TOLERANCE = 0.12
+MIN_YAW_SPREAD = 0.3  # Range of (nose - eye midpoint) / eye distance across accepted frames.
+
+# --- HELPER FUNCTIONS ---
+def face_crop_gray(frame, box):
+    """Returns the detected face region as a fixed-size greyscale image, or None if it is empty."""
+    h, w = frame.shape[:2]
+    x1, y1, x2, y2 = [int(v) for v in box]
+    x1, y1, x2, y2 = max(x1, 0), max(y1, 0), min(x2, w), min(y2, h)
+    if x2 <= x1 or y2 <= y1: return None
+    gray = cv2.cvtColor(frame[y1:y2, x1:x2], cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, (160, 160), interpolation=cv2.INTER_AREA)
+
+def estimate_yaw(landmarks):
+    """Approximates head yaw from the eye and nose landmarks; 0 is frontal, the sign is the direction."""
+    left_eye, right_eye, nose = landmarks[0], landmarks[1], landmarks[2]
+    eye_distance = np.linalg.norm(right_eye - left_eye)
+    if eye_distance == 0: return 0.0
+    return float((nose[0] - (left_eye[0] + right_eye[0]) / 2) / eye_distance)
+
+def update_running_stats(stats, embeddings):
+    """Folds a batch of embeddings into a running mean and variance (Welford) and returns the centroid's relative standard error."""
+    for embedding in embeddings.astype(np.float64):
+        stats['count'] += 1
+        delta = embedding - stats['mean']
+        stats['mean'] += delta / stats['count']
+        stats['m2'] += delta * (embedding - stats['mean'])
+    mean_norm = np.linalg.norm(stats['mean'])
+    if stats['count'] < 2 or mean_norm == 0: return float('inf')
+    return float(np.sqrt(stats['m2'].sum() / (stats['count'] - 1) / stats['count']) / mean_norm)
+
+def embed_batch(face_tensors):
+    """Runs one resnet forward pass over a batch of aligned face crops."""
+    with torch.no_grad():
+        return model(torch.stack(face_tensors).to(device)).cpu().numpy()
 
 # --- MAIN FUNCTION ---
 def register_new_face():
@@ -22,28 +67,59 @@ def register_new_face():
         return
 
     cap = cv2.VideoCapture(0)
-    print("✅ Webcam opened. Please look at the camera and hold still.")
+    print("✅ Webcam opened. Please look at the camera and slowly turn your head a little left and right.")
 
-    embeddings_list = []
-    last_capture_time = time.time()
+    stats = {'count': 0, 'mean': np.zeros(512), 'm2': np.zeros(512)}
+    rejected = {'low_prob': 0, 'blurry': 0, 'duplicate': 0}
+    pending_faces = []
+    last_thumbnail = None
+    min_yaw, max_yaw = float('inf'), float('-inf')
+    centroid_error = float('inf')
+    frames_checked = 0
+    start_time = time.time()
+    last_capture_time = 0
 
-    while len(embeddings_list) < SAMPLE_COUNT:
+    while stats['count'] < SAMPLE_COUNT:
         ret, frame = cap.read()
         if not ret:
             print("🔴 Failed to capture frame.")
             break
 
-        img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        face_tensor = mtcnn(img_rgb)
-
         current_time = time.time()
-        if face_tensor is not None and (current_time - last_capture_time) > 0.1:
-            embedding = model(face_tensor.unsqueeze(0).to(device)).detach().cpu().numpy()
-            embeddings_list.append(embedding)
+        if (current_time - last_capture_time) > CAPTURE_INTERVAL:
             last_capture_time = current_time
-            print(f"📸 Sample {len(embeddings_list)}/{SAMPLE_COUNT} captured.")
+            frames_checked += 1
+            img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            boxes, probs, landmarks = mtcnn.detect(img_rgb, landmarks=True)
+            crop = face_crop_gray(frame, boxes[0]) if boxes is not None else None
 
-        progress_text = f"Samples: {len(embeddings_list)} / {SAMPLE_COUNT}"
+            if crop is None:
+                pass
+            elif probs[0] < MIN_FACE_PROB:
+                rejected['low_prob'] += 1
+            elif cv2.Laplacian(crop, cv2.CV_64F).var() < MIN_SHARPNESS:
+                rejected['blurry'] += 1
+            else:
+                thumbnail = cv2.resize(crop, (32, 32), interpolation=cv2.INTER_AREA).astype(np.int16)
+                if last_thumbnail is not None and np.abs(thumbnail - last_thumbnail).mean() < DUPLICATE_THRESHOLD:
+                    rejected['duplicate'] += 1
+                else:
+                    face_tensor = mtcnn.extract(img_rgb, boxes, None)
+                    if face_tensor is not None:
+                        last_thumbnail = thumbnail
+                        pending_faces.append(face_tensor)
+                        yaw = estimate_yaw(landmarks[0])
+                        min_yaw, max_yaw = min(min_yaw, yaw), max(max_yaw, yaw)
+
+            if len(pending_faces) >= BATCH_SIZE:
+                centroid_error = update_running_stats(stats, embed_batch(pending_faces))
+                pending_faces = []
+                print(f"📸 {stats['count']} samples, centroid error {centroid_error:.4f}, yaw spread {max_yaw - min_yaw:.2f}")
+                if (stats['count'] >= MIN_SAMPLES and centroid_error < CONVERGENCE_TOLERANCE
+                        and max_yaw - min_yaw >= MIN_YAW_SPREAD):
+                    break
+
+        progress_text = f"Samples: {stats['count'] + len(pending_faces)} (max {SAMPLE_COUNT})"
         cv2.putText(frame, progress_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
         cv2.imshow('Register Face', frame)
 
@@ -56,16 +132,24 @@ def register_new_face():
     cap.release()
     cv2.destroyAllWindows()
 
-    if len(embeddings_list) < SAMPLE_COUNT:
+    if pending_faces:
+        centroid_error = update_running_stats(stats, embed_batch(pending_faces))
+
+    if stats['count'] < MIN_SAMPLES:
         print("🔴 Could not collect enough samples. Please try again.")
         return
 
+    variance = stats['m2'] / (stats['count'] - 1)
+    print(f"\n📊 Enrollment stats: {stats['count']} samples from {frames_checked} frames in {time.time() - start_time:.1f}s")
+    print(f"   Rejected: {rejected['low_prob']} low probability, {rejected['blurry']} blurry, {rejected['duplicate']} near-duplicate")
+    print(f"   Final centroid error: {centroid_error:.4f}, mean embedding variance: {variance.mean():.6f}, yaw spread: {max_yaw - min_yaw:.2f}")
+
     conn = get_db_connection()
     if not conn:
         return
 
     try:
-        final_embedding = np.mean(embeddings_list, axis=0)
+        final_embedding = stats['mean'].astype(np.float32).reshape(1, -1)
         with conn.cursor() as cur:
             # Use %s placeholders and embedding.tobytes() for PostgreSQL
             cur.execute(
@@ -9,6 +9,8 @@ interface Props {
 
 const AttendanceCameraModal: React.FC<Props> = ({ sessionName, onClose }) => {
   const videoRef = useRef<HTMLVideoElement>(null);
+  // Lets the server skip recognition when this camera's frame hasn't changed since the last scan.
+  const cameraIdRef = useRef(`camera-${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`);
   const [status, setStatus] = useState<{ type: 'info' | 'success' | 'error'; text: string }>({
     type: 'info',
     text: 'Initializing Camera...',
@@ -54,6 +56,7 @@ const AttendanceCameraModal: React.FC<Props> = ({ sessionName, onClose }) => {
       const formData = new FormData();
       formData.append('image', blob, 'scan.jpg');
       formData.append('sessionName', sessionName);
+      formData.append('cameraId', cameraIdRef.current);
 
       try {
         const response = await fetch('http://localhost:5000/api/mark-attendance-session', {